@@ -1,27 +1,60 @@
+import sys
+import time
+from dataclasses import dataclass
 from datetime import datetime  # хочу, чтобы была история добавление книги
 
+DT_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+@dataclass(slots=True)
+class BookRecord:
+    '''Компактная запись о книге: время хранится как целое число секунд (epoch).'''
+    title: str
+    ticket: str
+    ts: int
+
+    @property
+    def dt(self):
+        '''Дата и время в виде строки — форматируется только при выводе'''
+        return datetime.fromtimestamp(self.ts).strftime(DT_FORMAT)
+
+    def __str__(self):
+        return f"{self.title} | билет {self.ticket} | {self.dt}"
+
+
 class Library:
     def __init__(self):
         self.books_titles = []
-    
+        self._titles = set()
+
     def сheck_book(self, book_title):
-        return any(book["title"] == book_title for book in self.books_titles)
+        return book_title in self._titles
 
     def add_book(self, book_title, ticket):
         if not self.сheck_book(book_title):
-            book = {
-                'title': book_title, 
-                'ticket': ticket, 
-                'dt': datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-                }
+            # Номера билетов повторяются — храним одну копию строки
+            book = BookRecord(book_title, sys.intern(str(ticket)), int(time.time()))
             self.books_titles.append(book)
+            self._titles.add(book_title)
             print('Книга внесена в базу')
         else:
             print('Книга уже в базе')
 
     def all_books(self):
         return self.books_titles
-    
+
+    def books_between(self, start, end):
+        '''Книги, добавленные в промежутке [start, end] (datetime или epoch)'''
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        return [book for book in self.books_titles if start <= book.ts <= end]
+
+    def sorted_by_time(self, reverse=False):
+        return sorted(self.books_titles, key=lambda book: book.ts, reverse=reverse)
+
+
 if __name__ == "__main__":
     library = Library()
     book_title = input('Введине название книги: ')
@@ -29,4 +62,4 @@ if __name__ == "__main__":
     library.add_book(book_title, ticket)
 
     for book in library.all_books():
-        print(book)
\ No newline at end of file
+        print(book)
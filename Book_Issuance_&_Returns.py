@@ -2,22 +2,68 @@
 Что нужно сделать: программа должна сохранять историю по выдаче и возврату книг посетителей, удалять записи'''
 from datetime import datetime
 from pathlib import Path
-import json
+import time
+
+from booklog_schema import (
+    ISSUE,
+    LOG_FILE,
+    RETURN,
+    BookEvent,
+    aggregate_state_path,
+    dump_event,
+    iter_events,
+)
+
 
 class BookLog:
-    def __init__(self, json_file='story_books.json'):
-        self.json_file = Path(json_file)
-        self.books_titles = self._load_json()
-         
-    def load_json():
+    def __init__(self, log_file=LOG_FILE):
+        self.log_file = Path(log_file)
+        self.books_titles = self._load_log()
+
+    def _load_log(self):
         '''Загрузка из БД'''
-        pass
-    def save_json():
-        '''Сохранение в БД'''
-        pass
-    def book_history():
+        if not self.log_file.exists():
+            return []
+        return list(iter_events(self.log_file))
+
+    def _append_event(self, event):
+        '''Дописывает одно событие в конец журнала'''
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(dump_event(event))
+
+    def _save_log(self):
+        '''Полная перезапись журнала — только при удалении записей'''
+        with open(self.log_file, 'w', encoding='utf-8') as f:
+            f.writelines(dump_event(event) for event in self.books_titles)
+        # Смещения в журнале изменились — накопленные итоги отчета пересчитаются
+        aggregate_state_path(self.log_file).unlink(missing_ok=True)
+
+    def _add_event(self, action, book_title, ticket, age=None):
+        event = BookEvent(action, book_title, ticket, int(time.time()), age)
+        self.books_titles.append(event)
+        self._append_event(event)
+        return event
+
+    def issue_book(self, book_title, ticket, age=None):
+        '''Выдача книги читателю (age — возраст читателя для статистики)'''
+        return self._add_event(ISSUE, book_title, ticket, age)
+
+    def return_book(self, book_title, ticket, age=None):
+        '''Возврат книги'''
+        return self._add_event(RETURN, book_title, ticket, age)
+
+    def delete_record(self, index):
+        '''Удаление записи по номеру'''
+        event = self.books_titles.pop(index)
+        self._save_log()
+        return event
+
+    def book_history(self, book_title):
         '''История книги: взята или выдана, кому, когда'''
-        pass
-    def all_books():
+        return [event for event in self.books_titles if event.title == book_title]
+
+    def all_books(self):
         '''Вывод информации'''
-        pass
\ No newline at end of file
+        for i, event in enumerate(self.books_titles):
+            dt = datetime.fromtimestamp(event.ts).strftime("%d.%m.%Y %H:%M:%S")
+            print(f"{i}. {dt} | {event.action} | {event.title} | билет {event.ticket}")
@@ -1,17 +1,27 @@
 import datetime
+import fnmatch
+import json
+import multiprocessing
 import os
 import re
 import sys
 import threading
 import tkinter as tk
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
 from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-from typing import Dict, List
+from tkinter import font as tkfont
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 from openpyxl import load_workbook
 
+from booklog_schema import ISSUE, BookEvent, aggregate_state_path, iter_events_from
+from date_dimension import MONTH_NAMES, join_dates
+
 # ======================
 # === ВСПОМОГАТЕЛЬНЫЕ ===
 # ======================
@@ -27,33 +37,59 @@ def to_number(value) -> int:
         return 0
 
 
-def read_excel(file_path: Path):
-    """Читает активный лист Excel."""
+def open_workbook(file_path: Path):
+    """Открывает книгу в режиме read_only: листы разбираются только при чтении."""
     if not file_path.exists():
         raise FileNotFoundError(f"Файл не найден: {file_path}")
 
-    workbook = load_workbook(file_path, data_only=True)
-    return workbook.active
+    return load_workbook(file_path, read_only=True, data_only=True)
+
+
+def sheet_rows(ws) -> List[list]:
+    """Строки листа, выровненные по его ширине."""
+    rows = [list(row) for row in ws.iter_rows(values_only=True)]
+    width = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([None] * (width - len(row)))
+    return rows
+
+
+def read_excel(file_path: Path, sheet_name: str = None) -> List[list]:
+    """Читает строки листа Excel (по умолчанию активного)."""
+    workbook = open_workbook(file_path)
+    try:
+        return sheet_rows(workbook[sheet_name] if sheet_name else workbook.active)
+    finally:
+        workbook.close()
+
+
+def matching_sheets(workbook, pattern: str = "*") -> List[str]:
+    """Имена листов книги, подходящих под маску (например 'Январь*')."""
+    return [
+        ws.title
+        for ws in workbook.worksheets
+        if fnmatch.fnmatch(ws.title.lower(), pattern.lower())
+    ]
 
 
-def find_header(ws, keyword: str):
+def find_header(rows: List[list], keyword: str):
     """Ищет строку, содержащую указанный keyword."""
-    for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
+    for row_idx, row in enumerate(rows, 1):
         for cell_value in row:
             if cell_value and keyword in str(cell_value):
                 return row_idx
     return None
 
 
-def extract_table(ws, start_row: int):
+def has_layout(rows: List[list], is_header: Callable, min_columns: int) -> bool:
+    """Проверяет формат листа: есть строка-заголовок и хватает колонок."""
+    return any(len(row) >= min_columns and is_header(row) for row in rows)
+
+
+def extract_table(rows: List[list], start_row: int):
     """Собирает данные из листа начиная со строки start_row."""
     data_rows = []
-    for row_idx in range(start_row, ws.max_row + 1):
-        row_data = [
-            ws.cell(row=row_idx, column=col).value
-            for col in range(1, ws.max_column + 1)
-        ]
-
+    for row_data in rows[start_row - 1 :]:
         if not any(cell is not None for cell in row_data):
             break
 
@@ -76,34 +112,33 @@ def parse_date(value):
     return None
 
 
-def save_report(df: pd.DataFrame, source_path: Path, suffix: str) -> Path:
-    """Сохраняет итоговый DataFrame в Excel в подпапку с сегодняшней датой рядом с исходным файлом."""
+def report_path(source_path: Path, suffix: str) -> Path:
+    """Путь к отчету в подпапке с сегодняшней датой рядом с исходным файлом."""
     today_folder = datetime.date.today().strftime("%Y-%m-%d")  # например 2026-01-29
     out_dir = source_path.parent / today_folder
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    new_path = out_dir / f"{source_path.stem}-{suffix}{source_path.suffix}"
+    # Отчеты из журнала выдачи (JSONL) тоже сохраняем в Excel
+    ext = source_path.suffix if source_path.suffix in (".xlsx", ".xls") else ".xlsx"
+    return out_dir / f"{source_path.stem}-{suffix}{ext}"
+
+
+def save_report(df: pd.DataFrame, source_path: Path, suffix: str) -> Path:
+    """Сохраняет итоговый DataFrame в Excel в подпапку с сегодняшней датой рядом с исходным файлом."""
+    new_path = report_path(source_path, suffix)
     df.to_excel(new_path, index=False)
     return new_path
 
 
-def format_month_name(date: datetime.datetime) -> str:
-    """Форматирует название месяца на русском."""
-    month_names = {
-        1: "Январь",
-        2: "Февраль",
-        3: "Март",
-        4: "Апрель",
-        5: "Май",
-        6: "Июнь",
-        7: "Июль",
-        8: "Август",
-        9: "Сентябрь",
-        10: "Октябрь",
-        11: "Ноябрь",
-        12: "Декабрь",
-    }
-    return f"{month_names[date.month]} {date.year}"
+def save_report_sheets(
+    reports: Dict[str, pd.DataFrame], source_path: Path, suffix: str
+) -> Path:
+    """Сохраняет несколько отчетов в одну книгу — по листу на каждый."""
+    new_path = report_path(source_path, suffix)
+    with pd.ExcelWriter(new_path) as writer:
+        for sheet_name, df in reports.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return new_path
 
 
 def create_monthly_report(data: List[Dict], week_col: str = "№ недели") -> pd.DataFrame:
@@ -116,32 +151,26 @@ def create_monthly_report(data: List[Dict], week_col: str = "№ недели")
 
     # Преобразуем данные в DataFrame
     df = pd.DataFrame(data)
-
-    # Добавляем столбцы для месяца и года
     df["date"] = pd.to_datetime(df.get("date", pd.NaT))
-    df["month_year"] = df["date"].apply(
-        lambda x: format_month_name(x) if pd.notna(x) else ""
-    )
-    df["month_num"] = df["date"].dt.month
-    df["year"] = df["date"].dt.year
-    df["week_num"] = df[week_col]  # Сохраняем номер недели
 
     # Группируем по месяцу и неделе, суммируя все числовые колонки
-    numeric_cols = [
-        col
-        for col in df.columns
-        if col not in ["date", "month_year", "month_num", "year", week_col, "week_num"]
-    ]
+    numeric_cols = [col for col in df.columns if col not in ["date", week_col]]
+
+    # Месяц, год и ISO-неделю берем из справочника дат
+    df = join_dates(df)
+    df["week_num"] = df["iso_week"]
 
     # Суммируем данные по неделям в пределах каждого месяца
     grouped = (
-        df.groupby(["year", "month_num", "month_year", "week_num"])[numeric_cols]
+        df.groupby(["year", "month_num", "month_year", "week_start", "week_num"])[
+            numeric_cols
+        ]
         .sum()
         .reset_index()
     )
 
-    # Сортируем по дате
-    grouped = grouped.sort_values(["year", "month_num", "week_num"])
+    # Сортируем по началу недели: неделя 52-53 в январе идет раньше недели 1
+    grouped = grouped.sort_values(["year", "month_num", "week_start"])
 
     result_rows = []
     month_totals = {}
@@ -192,27 +221,159 @@ def create_monthly_report(data: List[Dict], week_col: str = "№ недели")
     return pd.DataFrame(result_rows)
 
 
+# ======================
+# === НЕСКОЛЬКО ЛИСТОВ ===
+# ======================
+
+
+# Начало строки-разделителя с названием листа в сводном предпросмотре
+SHEET_TITLE_PREFIX = "Лист: "
+
+
+# Процессы окупаются только на больших книгах: каждый процесс заново
+# импортирует pandas (в EXE на Windows — дорого) и заново разбирает общие
+# части книги (workbook.xml, sharedStrings.xml). Обычную книгу на 12 месяцев
+# быстрее прочитать за один проход.
+PARALLEL_MIN_SHEETS = 24
+MAX_SHEET_WORKERS = 4
+
+
+def extract_sheet(sheet_name: str, rows: List[list], extractor: Callable):
+    """
+    Разбирает строки одного листа.
+    Если формат листа не подходит отчету, вместо temp_data возвращается None.
+    """
+    if not REPORT_LAYOUTS[extractor](rows):
+        return sheet_name, None
+
+    try:
+        return sheet_name, extractor(rows)
+    except ValueError as e:
+        raise ValueError(f"Лист '{sheet_name}': {e}") from e
+
+
+def extract_sheet_batch(file_path: Path, names: List[str], extractor: Callable):
+    """Разбирает группу листов за одно открытие книги. Выполняется в отдельном процессе."""
+    workbook = open_workbook(file_path)
+    try:
+        return [
+            extract_sheet(name, sheet_rows(workbook[name]), extractor) for name in names
+        ]
+    finally:
+        workbook.close()
+
+
+def extract_sheets(
+    file_path: Path, extractor: Callable, pattern: str = "*", detect_layout=False
+) -> Dict[str, List[Dict]]:
+    """
+    Разбирает листы, подходящие под маску; каждый лист читается один раз.
+    До PARALLEL_MIN_SHEETS листов — последовательно за одно открытие книги.
+    Больше — группами в MAX_SHEET_WORKERS процессах; общие части книги
+    тогда разбираются один раз на процесс (плюс один раз для списка листов).
+    Формат каждого листа проверяется до разбора (REPORT_LAYOUTS):
+    с detect_layout листы другого формата пропускаются, иначе — ошибка.
+    """
+    workbook = open_workbook(file_path)
+    try:
+        names = matching_sheets(workbook, pattern)
+        if not names:
+            raise ValueError(f"Нет листов, подходящих под маску '{pattern}'")
+
+        sequential = len(names) < PARALLEL_MIN_SHEETS
+        if sequential:
+            outputs = [
+                extract_sheet(name, sheet_rows(workbook[name]), extractor)
+                for name in names
+            ]
+    finally:
+        workbook.close()
+
+    if not sequential:
+        workers = min(MAX_SHEET_WORKERS, os.cpu_count() or 1)
+        batches = [names[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch_outputs = pool.map(
+                extract_sheet_batch, repeat(file_path), batches, repeat(extractor)
+            )
+            by_name = dict(output for batch in batch_outputs for output in batch)
+        outputs = [(name, by_name[name]) for name in names]
+
+    results = {}
+    for sheet_name, temp_data in outputs:
+        if temp_data is None:
+            if detect_layout:
+                continue
+            raise ValueError(f"Лист '{sheet_name}': формат не соответствует отчету")
+        if temp_data:
+            results[sheet_name] = temp_data
+    return results
+
+
+def build_report(
+    file_path: Path,
+    extractor: Callable,
+    suffix: str,
+    sheets: str = None,
+    detect_layout: bool = False,
+    separate: bool = False,
+) -> Tuple[Path, pd.DataFrame]:
+    """
+    Строит и сохраняет отчет.
+    sheets=None — только активный лист; иначе маска имен листов ('*' — все).
+    separate=True — отчет по каждому листу на отдельном листе результата,
+    иначе данные всех листов сводятся в один отчет.
+    """
+    if sheets is None:
+        results = {"Отчет": extractor(read_excel(file_path))}
+    else:
+        results = extract_sheets(file_path, extractor, sheets, detect_layout)
+
+    results = {name: data for name, data in results.items() if data}
+    if not results:
+        raise ValueError("Нет данных для обработки.")
+
+    if not separate:
+        temp_data = [row for data in results.values() for row in data]
+        grouped = create_monthly_report(temp_data)
+        return save_report(grouped, file_path, suffix), grouped
+
+    reports = {name: create_monthly_report(data) for name, data in results.items()}
+    new_path = save_report_sheets(reports, file_path, suffix)
+
+    # Для предпросмотра склеиваем отчеты, разделяя их названием листа
+    parts = []
+    for name, df in reports.items():
+        title = pd.DataFrame([{df.columns[0]: f"{SHEET_TITLE_PREFIX}{name}"}])
+        parts += [title, df, pd.DataFrame([{}])]
+    return new_path, pd.concat(parts, ignore_index=True)
+
+
 # ======================
 # === ОТЧЕТ 1. ПОЛЬЗОВАТЕЛИ ===
 # ======================
 
 
-def process_report_1(file_path: Path) -> Path:
-    """1. Дневник библиотеки. Часть 1.1 — Пользователи."""
-    ws = read_excel(file_path)
-    header_row_idx = find_header(ws, "Дата")
+def is_report_1_header(row) -> bool:
+    return len(row) > 2 and row[1] == "Дата" and row[2] == "Всего читателей"
+
+
+def has_layout_1(rows: List[list]) -> bool:
+    """Заголовок 'Дата' / 'Всего читателей' и колонки до '56 и старше'."""
+    return has_layout(rows, is_report_1_header, 15)
+
+
+def extract_report_1(rows: List[list]) -> List[Dict]:
+    """1. Дневник библиотеки. Часть 1.1 — Пользователи: строки листа -> temp_data."""
+    header_row_idx = find_header(rows, "Дата")
 
     if not header_row_idx:
         raise ValueError("Не найден заголовок 'Дата'")
 
-    data_rows = extract_table(ws, header_row_idx)
+    data_rows = extract_table(rows, header_row_idx)
 
     header_row = next(
-        (
-            i
-            for i, row in enumerate(data_rows)
-            if len(row) > 2 and row[1] == "Дата" and row[2] == "Всего читателей"
-        ),
+        (i for i, row in enumerate(data_rows) if is_report_1_header(row)),
         None,
     )
     if header_row is None:
@@ -226,11 +387,9 @@ def process_report_1(file_path: Path) -> Path:
         if date_val is None:
             continue
 
-        week = date_val.isocalendar()[1]
         temp_data.append(
             {
                 "date": date_val,
-                "№ недели": week,
                 "0-6": to_number(row.iloc[7]),
                 "7-9": to_number(row.iloc[8]),
                 "10-14": to_number(row.iloc[9]),
@@ -241,11 +400,12 @@ def process_report_1(file_path: Path) -> Path:
             }
         )
 
-    if not temp_data:
-        raise ValueError("Нет данных для обработки.")
+    return temp_data
 
-    grouped = create_monthly_report(temp_data)
-    return save_report(grouped, file_path, "пользователи")
+
+def process_report_1(file_path: Path, **sheet_options) -> Tuple[Path, pd.DataFrame]:
+    """1. Дневник библиотеки. Часть 1.1 — Пользователи."""
+    return build_report(file_path, extract_report_1, "пользователи", **sheet_options)
 
 
 # ======================
@@ -253,16 +413,22 @@ def process_report_1(file_path: Path) -> Path:
 # ======================
 
 
-def process_report_2(file_path: Path) -> Path:
-    """2. Статистика записи читателей по округу/библиотеке."""
-    ws = read_excel(file_path)
-    header_row_idx = find_header(ws, "Пункт книговыдачи / период")
+def has_layout_2(rows: List[list]) -> bool:
+    """Заголовок 'Пункт книговыдачи / период', дата и число договоров."""
+    return has_layout(
+        rows, lambda row: any("Пункт книговыдачи / период" in str(v) for v in row), 3
+    )
+
+
+def extract_report_2(rows: List[list]) -> List[Dict]:
+    """2. Статистика записи читателей по округу/библиотеке: строки листа -> temp_data."""
+    header_row_idx = find_header(rows, "Пункт книговыдачи / период")
 
     if not header_row_idx:
         raise ValueError("Не найден заголовок 'Пункт книговыдачи / период'")
 
     temp_data = []
-    for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
+    for row_idx, row in enumerate(rows, 1):
         if row_idx <= header_row_idx or not row or not row[1]:
             continue
 
@@ -270,20 +436,21 @@ def process_report_2(file_path: Path) -> Path:
         if not date:
             continue
 
-        week = date.isocalendar()[1]
         temp_data.append(
             {
                 "date": date,
-                "№ недели": week,
                 "Договоры": to_number(row[2]),
             }
         )
 
-    if not temp_data:
-        raise ValueError("Нет данных для обработки.")
+    return temp_data
 
-    grouped = create_monthly_report(temp_data)
-    return save_report(grouped, file_path, "запись-читателей")
+
+def process_report_2(file_path: Path, **sheet_options) -> Tuple[Path, pd.DataFrame]:
+    """2. Статистика записи читателей по округу/библиотеке."""
+    return build_report(
+        file_path, extract_report_2, "запись-читателей", **sheet_options
+    )
 
 
 # ======================
@@ -291,15 +458,24 @@ def process_report_2(file_path: Path) -> Path:
 # ======================
 
 
-def process_report_3(file_path: Path) -> Path:
-    """3. Дневник библиотеки. Часть 1.2 — Посещения."""
-    ws = read_excel(file_path)
-    header_row_idx = find_header(ws, "Дата")
+def is_report_3_header(row) -> bool:
+    # Заголовок 'Дата' без 'Всего читателей' — иначе это лист пользователей
+    return len(row) > 1 and row[1] == "Дата" and not is_report_1_header(row)
+
+
+def has_layout_3(rows: List[list]) -> bool:
+    """Заголовок 'Дата' (не пользователи) и колонки до 'Почта'."""
+    return has_layout(rows, is_report_3_header, 22)
+
+
+def extract_report_3(rows: List[list]) -> List[Dict]:
+    """3. Дневник библиотеки. Часть 1.2 — Посещения: строки листа -> temp_data."""
+    header_row_idx = find_header(rows, "Дата")
 
     if not header_row_idx:
         raise ValueError("Не найден заголовок 'Дата'")
 
-    data_rows = extract_table(ws, header_row_idx)
+    data_rows = extract_table(rows, header_row_idx)
     data_start_row = next(
         (i for i, row in enumerate(data_rows) if len(row) > 1 and row[1] == "Дата"),
         None,
@@ -317,11 +493,9 @@ def process_report_3(file_path: Path) -> Path:
         if not date_val:
             continue
 
-        week = date_val.isocalendar()[1]
         temp_data.append(
             {
                 "date": date_val,
-                "№ недели": week,
                 "Посещения": to_number(row.iloc[4])
                 + to_number(row.iloc[7])
                 + to_number(row.iloc[9])
@@ -336,11 +510,12 @@ def process_report_3(file_path: Path) -> Path:
             }
         )
 
-    if not temp_data:
-        raise ValueError("Нет данных для обработки.")
+    return temp_data
 
-    grouped = create_monthly_report(temp_data)
-    return save_report(grouped, file_path, "посещения")
+
+def process_report_3(file_path: Path, **sheet_options) -> Tuple[Path, pd.DataFrame]:
+    """3. Дневник библиотеки. Часть 1.2 — Посещения."""
+    return build_report(file_path, extract_report_3, "посещения", **sheet_options)
 
 
 # ======================
@@ -348,20 +523,26 @@ def process_report_3(file_path: Path) -> Path:
 # ======================
 
 
-def process_report_4(file_path: Path) -> Path:
-    """4. Дневник библиотеки — статистика книговыдачи."""
-    ws = read_excel(file_path)
+def is_report_4_start(row) -> bool:
+    return bool(
+        row
+        and len(row) > 1
+        and row[1]
+        and isinstance(row[1], str)
+        and re.search(r"\b\d{4}-", row[1])
+    )
+
+
+def has_layout_4(rows: List[list]) -> bool:
+    """Строка с датой вида 'YYYY-...' и колонки до 'Молодежь 18-35 лет'."""
+    return has_layout(rows, is_report_4_start, 10)
+
+
+def extract_report_4(rows: List[list]) -> List[Dict]:
+    """4. Дневник библиотеки — статистика книговыдачи: строки листа -> temp_data."""
 
     data_start = next(
-        (
-            r
-            for r, row in enumerate(ws.iter_rows(values_only=True), 1)
-            if row
-            and len(row) > 1
-            and row[1]
-            and isinstance(row[1], str)
-            and re.search(r"\b\d{4}-", row[1])
-        ),
+        (r for r, row in enumerate(rows, 1) if is_report_4_start(row)),
         None,
     )
 
@@ -370,7 +551,7 @@ def process_report_4(file_path: Path) -> Path:
             "Не найдено начало таблицы с датами (ожидаю формат вроде 'YYYY-...')."
         )
 
-    data_rows = extract_table(ws, data_start)
+    data_rows = extract_table(rows, data_start)
     temp_data = []
 
     for row in data_rows:
@@ -381,7 +562,6 @@ def process_report_4(file_path: Path) -> Path:
         if not date_val:
             continue
 
-        week = date_val.isocalendar()[1]
         children_1 = sum(to_number(row[i]) for i in [5, 6, 7])
         children_2 = sum(to_number(row[i]) for i in [8])
         youth = sum(to_number(row[i]) for i in [9])
@@ -389,7 +569,6 @@ def process_report_4(file_path: Path) -> Path:
         temp_data.append(
             {
                 "date": date_val,
-                "№ недели": week,
                 "Всего": to_number(row[2]),
                 "Детям до 14 лет вкл.": children_1,
                 "Подростки 15-17 лет": children_2,
@@ -397,11 +576,145 @@ def process_report_4(file_path: Path) -> Path:
             }
         )
 
+    return temp_data
+
+
+def process_report_4(file_path: Path, **sheet_options) -> Tuple[Path, pd.DataFrame]:
+    """4. Дневник библиотеки — статистика книговыдачи."""
+    return build_report(file_path, extract_report_4, "книговыдача", **sheet_options)
+
+
+# Проверка формата листа для каждого отчета
+REPORT_LAYOUTS = {
+    extract_report_1: has_layout_1,
+    extract_report_2: has_layout_2,
+    extract_report_3: has_layout_3,
+    extract_report_4: has_layout_4,
+}
+
+
+# ======================
+# === ОТЧЕТ 4а. КНИГОВЫДАЧА ИЗ ЖУРНАЛА ===
+# ======================
+
+LENDING_COLUMNS = [
+    "Всего",
+    "Детям до 14 лет вкл.",
+    "Подростки 15-17 лет",
+    "Молодежь 18-35 лет",
+]
+
+
+def lending_age_group(age) -> Optional[str]:
+    """Возвращает колонку отчета книговыдачи для возраста читателя (или None)."""
+    try:
+        age = int(age)
+    except (ValueError, TypeError):
+        return None
+    if age < 0:
+        return None
+    if age <= 14:
+        return "Детям до 14 лет вкл."
+    if age <= 17:
+        return "Подростки 15-17 лет"
+    if age <= 35:
+        return "Молодежь 18-35 лет"
+    return None
+
+
+class LendingAggregator:
+    """
+    Инкрементальная агрегация событий BookLog по дням.
+    Итоги по дням и смещение последнего прочитанного байта журнала
+    сохраняются между запусками, так что update() дочитывает только
+    новые строки. Результат — temp_data для create_monthly_report.
+    """
+
+    def __init__(self):
+        self.days: Dict[datetime.date, Dict] = {}
+        self.offset = 0
+
+    @classmethod
+    def load(cls, state_file: Path) -> "LendingAggregator":
+        aggregator = cls()
+        if not state_file.exists():
+            return aggregator
+
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+
+        aggregator.offset = state["offset"]
+        for day_str, counts in state["days"].items():
+            day = datetime.date.fromisoformat(day_str)
+            aggregator.days[day] = {
+                "date": datetime.datetime.combine(day, datetime.time()),
+                **dict(zip(LENDING_COLUMNS, counts)),
+            }
+        return aggregator
+
+    def save(self, state_file: Path):
+        state = {
+            "offset": self.offset,
+            "days": {
+                day.isoformat(): [row[col] for col in LENDING_COLUMNS]
+                for day, row in self.days.items()
+            },
+        }
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def update(self, log_file: Path):
+        """Дочитывает журнал с последнего сохраненного смещения."""
+        for event, offset in iter_events_from(log_file, self.offset):
+            self.add(event)
+            self.offset = offset
+
+    def add(self, event: BookEvent):
+        if event.action != ISSUE:
+            return
+
+        day = datetime.date.fromtimestamp(event.ts)
+        row = self.days.get(day)
+        if row is None:
+            row = {
+                "date": datetime.datetime.combine(day, datetime.time()),
+                **{col: 0 for col in LENDING_COLUMNS},
+            }
+            self.days[day] = row
+
+        row["Всего"] += 1
+        group = lending_age_group(event.age)
+        if group:
+            row[group] += 1
+
+    def extend(self, events: Iterable[BookEvent]):
+        for event in events:
+            self.add(event)
+
+    def to_temp_data(self) -> List[Dict]:
+        return [self.days[day] for day in sorted(self.days)]
+
+
+def process_report_4_log(file_path: Path) -> Tuple[Path, pd.DataFrame]:
+    """4а. Книговыдача по журналу выдачи BookLog (JSON Lines) — без Excel-дневника."""
+    if not file_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {file_path}")
+
+    # Продолжаем с сохраненных итогов; если журнал перезаписан короче — с начала
+    state_file = aggregate_state_path(file_path)
+    aggregator = LendingAggregator.load(state_file)
+    if aggregator.offset > file_path.stat().st_size:
+        aggregator = LendingAggregator()
+
+    aggregator.update(file_path)
+    aggregator.save(state_file)
+    temp_data = aggregator.to_temp_data()
+
     if not temp_data:
         raise ValueError("Нет данных для обработки.")
 
     grouped = create_monthly_report(temp_data)
-    return save_report(grouped, file_path, "книговыдача")
+    return save_report(grouped, file_path, "книговыдача"), grouped
 
 
 # ======================
@@ -409,11 +722,128 @@ def process_report_4(file_path: Path) -> Path:
 # ======================
 
 
+class ReportPreview(ttk.Frame):
+    """
+    Предпросмотр отчета в Treeview.
+    В дереве держим только видимые строки и перерисовываем их при прокрутке,
+    поэтому отчеты на десятки тысяч строк не тормозят интерфейс.
+    """
+
+    def __init__(self, master, visible_rows: int = 8):
+        super().__init__(master)
+        self.visible_rows = visible_rows
+        self.offset = 0
+        self.values = []
+        self.tags = []
+
+        self.tree = ttk.Treeview(
+            self, show="headings", height=visible_rows, selectmode="none"
+        )
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Подсветка служебных строк отчета
+        self.tree.tag_configure(
+            "month", background="#dde8f5", font=("Arial", 9, "bold")
+        )
+        self.tree.tag_configure(
+            "sheet", background="#c6e0b4", font=("Arial", 10, "bold")
+        )
+        self.tree.tag_configure("total", background="#fff2cc")
+        self.tree.tag_configure(
+            "grand", background="#f8cbad", font=("Arial", 9, "bold")
+        )
+
+        # Высота строки — из стиля, иначе по шрифту
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        if not row_height:
+            row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") + 4
+        self.row_height = int(row_height)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+
+    def show(self, df: pd.DataFrame):
+        columns = [str(col) for col in df.columns]
+        self.tree.configure(columns=columns)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=110, anchor="center", stretch=True)
+
+        self.values = df.to_numpy(dtype=object)
+        first = df.iloc[:, 0].astype(str) if columns else pd.Series(dtype=str)
+        is_month = first.str.split().str[0].isin(MONTH_NAMES)
+        self.tags = (
+            first.map({"ИТОГО": "total", "ВСЕГО": "grand"})
+            .where(~is_month, "month")
+            .where(~first.str.startswith(SHEET_TITLE_PREFIX), "sheet")
+            .fillna("")
+            .tolist()
+        )
+
+        self.offset = 0
+        self.render()
+
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        total = len(self.values)
+        end = min(self.offset + self.visible_rows, total)
+
+        for i in range(self.offset, end):
+            cells = [self.format_cell(value) for value in self.values[i]]
+            self.tree.insert("", "end", values=cells, tags=(self.tags[i],))
+
+        if total:
+            self.scrollbar.set(self.offset / total, end / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    @staticmethod
+    def format_cell(value) -> str:
+        if pd.isna(value):
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    def scroll_to(self, offset: int):
+        max_offset = max(len(self.values) - self.visible_rows, 0)
+        offset = min(max(int(offset), 0), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.values))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(value) * step)
+
+    def on_wheel(self, event):
+        # На macOS delta мелкая (±1), на Windows кратна 120 — берем только знак
+        if event.delta:
+            self.scroll_to(self.offset + (-1 if event.delta > 0 else 1) * 3)
+
+    def on_resize(self, event):
+        # Одна строка уходит под заголовки колонок
+        visible_rows = max(event.height // self.row_height - 1, 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            max_offset = max(len(self.values) - visible_rows, 0)
+            self.offset = min(self.offset, max_offset)
+            self.render()
+
+
 class LibraryReportApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Обработчик отчетов библиотеки")
         self.root.geometry("800x600")
+        self.root.minsize(800, 600)
 
         # Установка иконки (если есть)
         try:
@@ -434,6 +864,17 @@ class LibraryReportApp:
         self.file_path = None
 
     def setup_ui(self):
+        # Статус бар пакуем первым, чтобы при нехватке места он не уезжал за край
+        self.status_var = tk.StringVar(value="Готов к работе")
+        status_bar = ttk.Label(
+            self.root,
+            textvariable=self.status_var,
+            relief=tk.SUNKEN,
+            anchor=tk.W,
+            padding=(10, 5),
+        )
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
         # Заголовок
         title_frame = ttk.Frame(self.root, padding="10")
         title_frame.pack(fill="x")
@@ -480,6 +921,7 @@ class LibraryReportApp:
             ("2. Статистика записи читателей по округу/библиотеке", 2),
             ("3. Дневник библиотеки. Часть 1.2 – Посещения", 3),
             ("4. Дневник библиотеки – статистика книговыдачи", 4),
+            ("4а. Книговыдача по журналу выдачи (JSONL)", 5),
         ]
 
         for text, value in reports:
@@ -488,6 +930,42 @@ class LibraryReportApp:
             )
             radio.pack(anchor="w", pady=2)
 
+        # Выбор листов книги
+        sheets_frame = ttk.LabelFrame(main_frame, text="Листы книги", padding="10")
+        sheets_frame.pack(fill="x", pady=(0, 10))
+
+        self.sheet_mode = tk.StringVar(value="active")
+        self.sheet_pattern_var = tk.StringVar(value="*")
+        self.separate_sheets_var = tk.BooleanVar(value=False)
+
+        modes_frame = ttk.Frame(sheets_frame)
+        modes_frame.pack(fill="x")
+
+        sheet_modes = [
+            ("Активный лист", "active"),
+            ("Все листы", "all"),
+            ("По маске имени:", "pattern"),
+            ("По формату (автоопределение)", "auto"),
+        ]
+
+        for text, value in sheet_modes:
+            radio = ttk.Radiobutton(
+                modes_frame, text=text, variable=self.sheet_mode, value=value
+            )
+            radio.pack(side="left", padx=(0, 5))
+            if value == "pattern":
+                pattern_entry = ttk.Entry(
+                    modes_frame, textvariable=self.sheet_pattern_var, width=12
+                )
+                pattern_entry.pack(side="left", padx=(0, 10))
+
+        separate_check = ttk.Checkbutton(
+            sheets_frame,
+            text="Отчет по каждому листу на отдельном листе результата",
+            variable=self.separate_sheets_var,
+        )
+        separate_check.pack(anchor="w", pady=(5, 0))
+
         # Описание формата
         desc_frame = ttk.LabelFrame(
             main_frame, text="Формат выходного отчета", padding="10"
@@ -526,32 +1004,36 @@ class LibraryReportApp:
         )
         self.open_folder_btn.pack(side="left")
 
+        # Лог и предпросмотр делят одно место на вкладках
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill="both", expand=True, pady=(10, 0))
+
         # Лог сообщений
-        log_frame = ttk.LabelFrame(main_frame, text="Лог обработки", padding="10")
-        log_frame.pack(fill="both", expand=True, pady=(10, 0))
+        log_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(log_frame, text="Лог обработки")
 
         self.log_text = scrolledtext.ScrolledText(
             log_frame, height=10, wrap=tk.WORD, font=("Courier New", 9)
         )
         self.log_text.pack(fill="both", expand=True)
 
-        # Статус бар
-        self.status_var = tk.StringVar(value="Готов к работе")
-        status_bar = ttk.Label(
-            self.root,
-            textvariable=self.status_var,
-            relief=tk.SUNKEN,
-            anchor=tk.W,
-            padding=(10, 5),
-        )
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Предпросмотр результата
+        preview_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(preview_frame, text="Предпросмотр отчета")
+
+        self.preview = ReportPreview(preview_frame)
+        self.preview.pack(fill="both", expand=True)
 
         # Стили
         style = ttk.Style()
         style.configure("Accent.TButton", font=("Arial", 10, "bold"))
 
     def browse_file(self):
-        filetypes = (("Excel files", "*.xlsx *.xls"), ("All files", "*.*"))
+        filetypes = (
+            ("Excel files", "*.xlsx *.xls"),
+            ("Журнал выдачи", "*.jsonl"),
+            ("All files", "*.*"),
+        )
 
         filename = filedialog.askopenfilename(
             title="Выберите файл отчета", filetypes=filetypes
@@ -584,10 +1066,15 @@ class LibraryReportApp:
             2: ("запись-читателей", process_report_2),
             3: ("посещения", process_report_3),
             4: ("книговыдача", process_report_4),
+            5: ("книговыдача-журнал", process_report_4_log),
         }
 
         report_name, processor = processors[report_num]
 
+        # Журнал выдачи (JSONL) листов не имеет
+        if processor is not process_report_4_log:
+            processor = partial(processor, **self.sheet_options())
+
         # Отключаем кнопку на время обработки
         self.process_btn.config(state="disabled")
         self.open_folder_btn.config(state="disabled")
@@ -599,24 +1086,42 @@ class LibraryReportApp:
         )
         thread.start()
 
+    def sheet_options(self) -> Dict:
+        mode = self.sheet_mode.get()
+        if mode == "active":
+            return {}
+
+        pattern = self.sheet_pattern_var.get().strip() if mode == "pattern" else ""
+        return {
+            "sheets": pattern or "*",
+            "detect_layout": mode == "auto",
+            "separate": self.separate_sheets_var.get(),
+        }
+
     def run_processor(self, processor, report_name: str):
         try:
             self.log_message(f"Начинаю обработку отчета '{report_name}'...")
 
             # Выполняем обработку
-            result_path = processor(self.file_path)
+            result_path, report_df = processor(self.file_path)
 
             # Обновляем GUI в основном потоке
-            self.root.after(0, self.on_processing_complete, result_path, report_name)
+            self.root.after(
+                0, self.on_processing_complete, result_path, report_name, report_df
+            )
 
         except Exception as e:
             error_msg = f"Ошибка обработки: {str(e)}\n{traceback.format_exc()}"
             self.root.after(0, self.on_processing_error, error_msg)
 
-    def on_processing_complete(self, result_path: Path, report_name: str):
+    def on_processing_complete(
+        self, result_path: Path, report_name: str, report_df: pd.DataFrame
+    ):
         self.process_btn.config(state="normal")
         self.open_folder_btn.config(state="normal")
         self.status_var.set("Обработка завершена")
+        self.preview.show(report_df)
+        self.notebook.select(1)
 
         self.log_message(f"✅ Отчет успешно сохранен!")
         self.log_message(f"📁 Файл: {result_path}")
@@ -671,12 +1176,13 @@ def main():
     root.update_idletasks()
     width = root.winfo_width()
     height = root.winfo_height()
-    x = (root.winfo_screenwidth() // 2) - (width // 2)
-    y = (root.winfo_screenheight() // 2) - (height // 2)
+    x = max((root.winfo_screenwidth() // 2) - (width // 2), 0)
+    y = max((root.winfo_screenheight() // 2) - (height // 2), 0)
     root.geometry(f"{width}x{height}+{x}+{y}")
 
     root.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # для параллельного чтения листов в EXE
     main()
@@ -1,26 +1,57 @@
 from tkinter import *
-from tkinter import messagebox
-import locale
+from tkinter import filedialog, messagebox, scrolledtext
 from datetime import date, timedelta, datetime
 
+from date_dimension import WEEKDAYS, date_table
 
-def calendar_date():
-    try:
-        locale.setlocale(locale.LC_ALL, "ru_RU.UTF-8")
-        date_str = date_need_tf.get()
-        d, m, y = [int(i) for i in date_str.split(".")]
-        dt = date(y, m, d)
 
-        data_in = datetime.strftime(dt, "%x")
-        week_in = datetime.strftime(dt, "%A")
+def parse_date(date_str):
+    d, m, y = [int(i) for i in date_str.strip().split(".")]
+    return date(y, m, d)
+
+
+def date_range(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def calendar_table(dates):
+    """Справочник дат с запасом в неделю, чтобы крайние недели были полными"""
+    table = date_table(min(dates) - timedelta(days=6), max(dates) + timedelta(days=6))
+    return table.set_index("date")
+
 
-        while dt.weekday() != 0:
-            dt -= timedelta(days=1)
+def week_days(table, monday):
+    return table.loc[monday : monday + timedelta(days=6), "day_label"].tolist()
 
-        week_out = []
-        for _ in range(7):
-            week_out.append(datetime.strftime(dt, "%d %B %Y - %A"))
-            dt += timedelta(days=1)
+
+def build_schedule(dates):
+    """Строки расписания: по каждой дате день недели и ISO-неделя, затем полные недели (каждая один раз)"""
+    table = calendar_table(dates)
+    rows = table.loc[[datetime.combine(dt, datetime.min.time()) for dt in dates]]
+
+    lines = [
+        f"{row.Index:%d.%m.%Y} - {WEEKDAYS[row.weekday]}, неделя {row.iso_week} ({row.iso_year})"
+        for row in rows.itertuples()
+    ]
+
+    lines.append("")
+    weeks = rows.drop_duplicates("week_start").sort_values("week_start")
+    for row in weeks.itertuples():
+        lines.append(f"Неделя {row.iso_week} ({row.iso_year}):")
+        lines.extend(week_days(table, row.week_start))
+        lines.append("")
+    return lines
+
+
+def calendar_date():
+    try:
+        dt = parse_date(date_need_tf.get())
+        table = calendar_table([dt])
+        row = table.loc[datetime.combine(dt, datetime.min.time())]
+
+        data_in = dt.strftime("%d.%m.%Y")
+        week_in = WEEKDAYS[row["weekday"]]
+        week_out = week_days(table, row["week_start"])
 
         message = f"Дата: {data_in}\nДень недели: {week_in}\n\nНеделя:\n" + "\n".join(
             week_out
@@ -31,6 +62,47 @@ def calendar_date():
         messagebox.showerror("Ошибка", f"Произошла ошибка: {e}")
 
 
+def calendar_range():
+    try:
+        dates_str = dates_list_tf.get().replace(",", " ").split()
+        if dates_str:
+            dates = sorted({parse_date(i) for i in dates_str})
+        else:
+            start = parse_date(date_start_tf.get())
+            end = parse_date(date_end_tf.get())
+            if end < start:
+                start, end = end, start
+            dates = date_range(start, end)
+
+        show_schedule("\n".join(build_schedule(dates)))
+
+    except Exception as e:
+        messagebox.showerror("Ошибка", f"Произошла ошибка: {e}")
+
+
+def show_schedule(text):
+    top = Toplevel(window)
+    top.title("Расписание")
+    top.geometry("500x600")
+
+    text_box = scrolledtext.ScrolledText(top, wrap=WORD)
+    text_box.insert(END, text)
+    text_box.config(state=DISABLED)
+    text_box.pack(fill=BOTH, expand=True)
+
+    Button(top, text="Сохранить в файл", command=lambda: export_schedule(text)).pack()
+
+
+def export_schedule(text):
+    filename = filedialog.asksaveasfilename(
+        defaultextension=".txt", filetypes=(("Текст", "*.txt"), ("Все файлы", "*.*"))
+    )
+    if filename:
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(text)
+        messagebox.showinfo("Готово", f"Сохранено: {filename}")
+
+
 # ГУИ
 
 window = Tk()
@@ -45,14 +117,30 @@ frame.pack(expand=True)
 # День
 date_need_lf = Label(frame, text="Введите дату (дд.мм.гггг): ")
 date_need_lf.grid(row=3, column=1)
+# Диапазон
+date_start_lf = Label(frame, text="С даты (дд.мм.гггг): ")
+date_start_lf.grid(row=7, column=1)
+date_end_lf = Label(frame, text="По дату (дд.мм.гггг): ")
+date_end_lf.grid(row=8, column=1)
+dates_list_lf = Label(frame, text="Или список дат через запятую: ")
+dates_list_lf.grid(row=9, column=1)
 
 # Названия окон ввода
 # День
 date_need_tf = Entry(frame)
 date_need_tf.grid(row=3, column=2)
+# Диапазон
+date_start_tf = Entry(frame)
+date_start_tf.grid(row=7, column=2)
+date_end_tf = Entry(frame)
+date_end_tf.grid(row=8, column=2)
+dates_list_tf = Entry(frame)
+dates_list_tf.grid(row=9, column=2)
 
 # Кнопка для вывода
 res = Button(frame, text="Отчёт", command=calendar_date)
 res.grid(row=6, column=2)
+res_range = Button(frame, text="Расписание", command=calendar_range)
+res_range.grid(row=10, column=2)
 
 window.mainloop()
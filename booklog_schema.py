@@ -0,0 +1,75 @@
+"""
+Формат журнала выдачи книг (BookLog).
+
+Журнал хранится в JSON Lines: одно событие на строку, новые события
+дописываются в конец файла. Так запись события не переписывает весь
+файл, а отчеты читают журнал построчно.
+"""
+
+import json
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+ISSUE = "выдача"
+RETURN = "возврат"
+
+LOG_FILE = "story_books.jsonl"
+
+
+@dataclass(slots=True)
+class BookEvent:
+    """Событие журнала: время хранится как epoch-секунды, форматируется при выводе."""
+
+    action: str
+    title: str
+    ticket: str
+    ts: int
+    age: Optional[int] = None
+
+    def __post_init__(self):
+        # Действия и номера билетов повторяются — храним одну копию строки
+        self.action = sys.intern(self.action)
+        self.ticket = sys.intern(str(self.ticket))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BookEvent":
+        return cls(
+            data["action"], data["title"], data["ticket"], data["ts"], data.get("age")
+        )
+
+
+def iter_events_from(
+    log_file: Path, offset: int = 0
+) -> Iterator[Tuple[BookEvent, int]]:
+    """
+    Читает события начиная с байтового смещения offset.
+    Вместе с событием отдает смещение конца его строки; недописанная
+    последняя строка (без перевода строки) пропускается.
+    """
+    with open(log_file, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            line = line.strip()
+            if line:
+                yield BookEvent.from_dict(json.loads(line.decode("utf-8"))), offset
+
+
+def iter_events(log_file: Path) -> Iterator[BookEvent]:
+    """Читает события журнала по одной строке."""
+    for event, _ in iter_events_from(log_file):
+        yield event
+
+
+def aggregate_state_path(log_file: Path) -> Path:
+    """Файл с сохраненным состоянием агрегации отчета по журналу."""
+    return log_file.with_name(log_file.name + ".lending.json")
+
+
+def dump_event(event: BookEvent) -> str:
+    """Строка журнала для одного события."""
+    return json.dumps(asdict(event), ensure_ascii=False) + "\n"
@@ -0,0 +1,114 @@
+"""
+Справочник дат (date dimension) для отчетов и календаря.
+
+Для каждого дня диапазона заранее посчитаны ISO-неделя, месяц,
+русское название месяца и начало недели. Таблица строится векторно
+и кэшируется по целым годам, поэтому построчные вызовы isocalendar()
+и strftime не нужны — достаточно присоединить таблицу по дате.
+"""
+
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = (
+    "Январь",
+    "Февраль",
+    "Март",
+    "Апрель",
+    "Май",
+    "Июнь",
+    "Июль",
+    "Август",
+    "Сентябрь",
+    "Октябрь",
+    "Ноябрь",
+    "Декабрь",
+)
+
+# Родительный падеж — для записи вида "01 января 2026"
+MONTH_NAMES_GEN = (
+    "января",
+    "февраля",
+    "марта",
+    "апреля",
+    "мая",
+    "июня",
+    "июля",
+    "августа",
+    "сентября",
+    "октября",
+    "ноября",
+    "декабря",
+)
+
+WEEKDAYS = (
+    "понедельник",
+    "вторник",
+    "среда",
+    "четверг",
+    "пятница",
+    "суббота",
+    "воскресенье",
+)
+
+
+@lru_cache(maxsize=16)
+def _year_table(first_year: int, last_year: int) -> pd.DataFrame:
+    days = pd.date_range(
+        datetime.date(first_year, 1, 1), datetime.date(last_year, 12, 31), freq="D"
+    )
+    iso = days.isocalendar()
+    month_idx = days.month.to_numpy() - 1
+    weekday = days.weekday.to_numpy()
+    year_str = days.year.astype(str).to_numpy(dtype=object)
+    day_str = days.strftime("%d").to_numpy(dtype=object)
+
+    return pd.DataFrame(
+        {
+            "date": days,
+            "year": days.year,
+            "month_num": days.month,
+            "month_year": np.asarray(MONTH_NAMES, dtype=object)[month_idx]
+            + " "
+            + year_str,
+            # ISO-год отличается от календарного на стыке лет (неделя 1 и 52-53)
+            "iso_year": iso["year"].to_numpy(dtype=int),
+            "iso_week": iso["week"].to_numpy(dtype=int),
+            "weekday": weekday,
+            "week_start": days - pd.to_timedelta(weekday, unit="D"),
+            "day_label": day_str
+            + " "
+            + np.asarray(MONTH_NAMES_GEN, dtype=object)[month_idx]
+            + " "
+            + year_str
+            + " - "
+            + np.asarray(WEEKDAYS, dtype=object)[weekday],
+        }
+    )
+
+
+def date_table(start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    """
+    Возвращает справочник дат, покрывающий [start, end] (с запасом до целых лет).
+    Таблица общая для всех вызовов из кэша — не изменяйте ее на месте.
+    """
+    if end < start:
+        start, end = end, start
+    return _year_table(start.year, end.year)
+
+
+def join_dates(df: pd.DataFrame, date_col: str = "date") -> pd.DataFrame:
+    """Присоединяет к df колонки справочника по дню из date_col."""
+    days = pd.to_datetime(df[date_col]).dt.normalize()
+    valid = days.dropna()
+    if valid.empty:
+        table = _year_table(datetime.date.today().year, datetime.date.today().year)
+    else:
+        table = date_table(valid.min().date(), valid.max().date())
+
+    dim = table.drop(columns="day_label").rename(columns={"date": "_day"})
+    joined = df.assign(_day=days.to_numpy()).merge(dim, on="_day", how="left")
+    return joined.drop(columns="_day")